@@ -0,0 +1,530 @@
+"""Cached metadata for Claude Code session transcripts.
+
+The claude-* tools need a handful of facts about each transcript under
+~/.claude/projects/ (its title, the session it was forked from, how many
+turns it has, its first prompt, the models that answered it). Getting them
+means reading the whole .jsonl file, and transcripts run to many megabytes,
+so the facts are kept in a SQLite index (~/.cache/claude-index.sqlite, or
+under $XDG_CACHE_HOME) keyed by path, mtime and size. A transcript is parsed
+again only when its mtime or size has changed since it was indexed.
+
+Transcripts are append-only, so a changed transcript is usually an old one
+with new lines at the end. The index records how far into the file it has
+parsed, and a checksum of the bytes at the start of the file and just before
+that offset; if those bytes are unchanged, parsing resumes from the offset
+with the aggregate state (turns, titles, parent, ...) stored alongside it.
+Otherwise the file has been truncated or rewritten and is parsed afresh.
+
+The tools import this module from their own directory:
+
+    import claude_index
+    for t in claude_index.sessions(directory):
+        print(t.sid, t.name, t.turns)
+"""
+
+import glob
+import json
+import mmap
+import os
+import re
+import sqlite3
+import sys
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, replace
+from typing import Any, BinaryIO, Callable, Iterator
+
+SCHEMA_VERSION = 4
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS titles (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    fingerprint INTEGER NOT NULL,
+    custom_title TEXT,
+    ai_title TEXT
+);
+CREATE TABLE IF NOT EXISTS transcripts (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    fingerprint INTEGER NOT NULL,
+    parent TEXT,
+    custom_title TEXT,
+    ai_title TEXT,
+    first_prompt TEXT,
+    turns INTEGER NOT NULL,
+    models TEXT NOT NULL
+)
+"""
+COLUMNS = (
+    "path",
+    "mtime_ns",
+    "size",
+    "offset",
+    "fingerprint",
+    "parent",
+    "custom_title",
+    "ai_title",
+    "first_prompt",
+    "turns",
+    "models",
+)
+
+# Bytes at the start of a transcript, and just before the parsed offset, whose
+# checksum must match for parsing to resume at that offset.
+FINGERPRINT_SPAN = 4096
+
+# Byte patterns picking out the lines that may change a transcript's entry;
+# see wants().
+TITLE = b'Title"'  # customTitle, aiTitle
+FORKED_FROM = b'"forkedFrom"'
+TYPE = b'"type":"'
+USER = b'"type":"user"'
+ASSISTANT = b'"type":"assistant"'
+MODEL = re.compile(rb'"model":"([^"\\]+)"')
+
+# Transcript lines run to megabytes; with the default 8 KiB buffer, splitting
+# them costs more than searching them.
+READ_BUFFER = 1 << 20
+
+# Transcripts are parsed in a process pool once there are this many bytes to
+# parse; below it, starting the pool costs more than it saves.
+PARALLEL_MIN_BYTES = 16 << 20
+
+# First prompts are kept only as long as any tool displays them.
+MAX_PROMPT = 500
+
+# Records Claude Code writes as the user for slash commands and ! shell
+# commands: <command-name>, <local-command-stdout>, <bash-input> and the like.
+COMMAND_RECORD = re.compile(r"\s*<(command|local-command|bash)-[a-z]+>")
+
+
+@dataclass
+class Transcript:
+    path: str
+    mtime_ns: int
+    size: int
+    offset: int = 0  # bytes parsed: the end of the last complete line
+    fingerprint: int = 0
+    parent: str | None = None
+    custom_title: str | None = None
+    ai_title: str | None = None
+    first_prompt: str | None = None
+    turns: int = 0
+    models: list[str] = field(default_factory=list)
+
+    @property
+    def sid(self) -> str:
+        return sid(self.path)
+
+    @property
+    def mtime(self) -> float:
+        return self.mtime_ns / 1e9
+
+    @property
+    def name(self) -> str | None:
+        return self.custom_title or self.ai_title
+
+
+def sid(path: str) -> str:
+    """The session id of a transcript: its file name without .jsonl."""
+    return os.path.basename(path)[:-6]
+
+
+def is_command_record(text: str) -> bool:
+    """Whether the text of a user record is one Claude Code wrote for a
+    command, not a prompt the user typed."""
+    return COMMAND_RECORD.match(text) is not None
+
+
+def projects_dir() -> str:
+    return os.path.expanduser("~/.claude/projects")
+
+
+def cache_dir() -> str:
+    return os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+
+
+def index_path() -> str:
+    return os.path.join(cache_dir(), "claude-index.sqlite")
+
+
+def transcript_paths(directory: str | None = None) -> list[str]:
+    """Return the transcripts in one project directory (default: all projects)."""
+    if directory:
+        return glob.glob(os.path.join(directory, "*.jsonl"))
+    return glob.glob(os.path.join(projects_dir(), "*", "*.jsonl"))
+
+
+def sessions(
+    directory: str | None = None, workers: int | None = None
+) -> list[Transcript]:
+    """Return the transcripts in one project directory (default: all projects).
+
+    Transcripts whose mtime and size match the index are read from it; the
+    rest are parsed, by up to `workers` processes (default: one per CPU), and
+    written back. Index rows for transcripts that no longer exist are dropped.
+    """
+    root = directory or projects_dir()
+    stats = {}
+    for path in transcript_paths(directory):
+        try:
+            stats[path] = os.stat(path)
+        except FileNotFoundError:
+            continue
+
+    db = connect()
+    prefix = os.path.join(root, "")
+    cached = {
+        row[0]: from_row(row)
+        for row in db.execute(
+            f"SELECT {', '.join(COLUMNS)} FROM transcripts WHERE substr(path, 1, ?) = ?",
+            (len(prefix), prefix),
+        )
+    }
+    result, jobs = [], []
+    for path, st in stats.items():
+        t = cached.pop(path, None)
+        if t is None or (t.mtime_ns, t.size) != (st.st_mtime_ns, st.st_size):
+            jobs.append((path, st.st_mtime_ns, st.st_size, t))
+        else:
+            result.append(t)
+    stale = parse_all(jobs, workers)
+    result += stale
+
+    try:
+        with db:
+            db.executemany(
+                f"INSERT OR REPLACE INTO transcripts ({', '.join(COLUMNS)})"
+                f" VALUES ({', '.join('?' * len(COLUMNS))})",
+                [to_row(t) for t in stale],
+            )
+            db.executemany(
+                "DELETE FROM transcripts WHERE path = ?", [(p,) for p in cached]
+            )
+    except sqlite3.OperationalError:
+        pass  # locked or read-only; the results are still correct, just not cached
+    db.close()
+    return result
+
+
+def titles(paths: list[str], workers: int | None = None) -> dict[str, str | None]:
+    """Return the title of each transcript in paths that still exists.
+
+    Titles come from the index where its entry is current. Other transcripts
+    are not parsed (finding a session by name should not cost a full parse of
+    every transcript); instead scan_titles() searches each one backwards for
+    its latest title records, using up to `workers` processes. What it finds,
+    including that there is no title, is kept in the titles table, so the next
+    lookup searches only the lines appended since.
+    """
+    db = connect()
+    indexed = {
+        path: (mtime_ns, size, custom_title or ai_title)
+        for path, mtime_ns, size, custom_title, ai_title in db.execute(
+            "SELECT path, mtime_ns, size, custom_title, ai_title FROM transcripts"
+        )
+    }
+    scanned = {row[0]: row for row in db.execute("SELECT * FROM titles")}
+    result, jobs, pending = {}, [], 0
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            continue
+        entry, base = indexed.get(path), scanned.pop(path, None)
+        if entry and entry[:2] == (st.st_mtime_ns, st.st_size):
+            result[path] = entry[2]
+        elif base and base[1:3] == (st.st_mtime_ns, st.st_size):
+            result[path] = base[5] or base[6]
+        else:
+            jobs.append((path, st.st_mtime_ns, st.st_size, base))
+            pending += st.st_size - (base[3] if base else 0)
+    rows = [row for row in map_files(scan_titles, jobs, pending, workers) if row]
+    result.update((row[0], row[5] or row[6]) for row in rows)
+
+    try:
+        with db:
+            db.executemany("INSERT OR REPLACE INTO titles VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            db.executemany(
+                "DELETE FROM titles WHERE path = ?",
+                [(p,) for p in scanned if not os.path.exists(p)],
+            )
+    except sqlite3.OperationalError:
+        pass  # locked or read-only; the results are still correct, just not cached
+    db.close()
+    return result
+
+
+def resolve(identifier: str, paths: list[str]) -> str:
+    """Return the transcript in paths whose session id starts with identifier,
+    else whose title contains it (case-insensitively); exit with a message
+    listing the candidates if there is none or more than one."""
+    ident = identifier.lower()
+    by_id = [p for p in paths if sid(p).lower().startswith(ident)]
+    if len(by_id) == 1:
+        return by_id[0]
+    if len(by_id) > 1:
+        found = titles(by_id)
+        sys.exit(ambiguous("id prefix", [(sid(p), found.get(p)) for p in by_id]))
+
+    by_name = [(p, t) for p, t in titles(paths).items() if t and ident in t.lower()]
+    if len(by_name) == 1:
+        return by_name[0][0]
+    if len(by_name) > 1:
+        sys.exit(ambiguous("name", [(sid(p), t) for p, t in by_name]))
+    sys.exit(f"no session matching {identifier!r} under ~/.claude/projects/")
+
+
+def ambiguous(kind: str, candidates: list[tuple[str, str | None]]) -> str:
+    lines = "\n".join(f"  {session[:8]}  {title or ''}" for session, title in candidates)
+    return f"{len(candidates)} sessions match that {kind}; be more specific:\n{lines}"
+
+
+def parse_all(
+    jobs: list[tuple[str, int, int, Transcript | None]], workers: int | None
+) -> list[Transcript]:
+    """Parse each (path, mtime_ns, size, base) job, skipping vanished files."""
+    pending = sum(size - (base.offset if base else 0) for _, _, size, base in jobs)
+    parsed = map_files(parse_job, jobs, pending, workers)
+    return [t for t in parsed if t is not None]
+
+
+def map_files(
+    fn: Callable[[Any], Any], jobs: list, pending: int, workers: int | None
+) -> list:
+    """Return [fn(job) for job in jobs], in order.
+
+    The jobs are run in a pool of up to `workers` processes (default: one per
+    CPU) if the bytes they have to read, `pending`, pay for starting it.
+    """
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    if workers > 1 and pending >= PARALLEL_MIN_BYTES:
+        with ProcessPoolExecutor(workers) as pool:
+            return list(pool.map(fn, jobs, chunksize=4))
+    return [fn(job) for job in jobs]
+
+
+def connect() -> sqlite3.Connection:
+    """Open the index, (re)creating its tables if missing or of an older schema.
+
+    Falls back to an in-memory database if the cache directory is unusable,
+    so the tools keep working, just without caching.
+    """
+    path = index_path()
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        db = sqlite3.connect(path, timeout=10)
+        if db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            db.executescript(
+                f"DROP TABLE IF EXISTS transcripts; DROP TABLE IF EXISTS titles; {SCHEMA};"
+                f" PRAGMA user_version = {SCHEMA_VERSION};"
+            )
+        return db
+    except (OSError, sqlite3.Error):
+        db = sqlite3.connect(":memory:")
+        db.executescript(SCHEMA)
+        return db
+
+
+def from_row(row: tuple) -> Transcript:
+    fields = dict(zip(COLUMNS, row))
+    fields["models"] = json.loads(fields["models"])
+    return Transcript(**fields)
+
+
+def to_row(t: Transcript) -> tuple:
+    fields = {name: getattr(t, name) for name in COLUMNS}
+    fields["models"] = json.dumps(t.models)
+    return tuple(fields.values())
+
+
+def parse(
+    path: str, mtime_ns: int, size: int, base: Transcript | None = None
+) -> Transcript:
+    """Parse a transcript, resuming from base (its previous parse) if possible."""
+    with open(path, "rb", buffering=READ_BUFFER) as f:
+        if (
+            base is not None
+            and base.offset <= size
+            and fingerprint(f, base.offset) == base.fingerprint
+        ):
+            t = replace(base, mtime_ns=mtime_ns, size=size, models=list(base.models))
+        else:
+            t = Transcript(path, mtime_ns, size)
+        for t.offset, line in lines(f, t.offset):
+            kind = record_type(line)
+            if wants(t, line, kind):
+                try:
+                    obj = json.loads(line)
+                except ValueError:
+                    continue
+            elif kind == b"user":
+                obj = {"type": "user"}  # a turn, but nothing else in it is needed
+            else:
+                continue
+            if isinstance(obj, dict):
+                update(t, obj)
+        t.fingerprint = fingerprint(f, t.offset)
+    return t
+
+
+def parse_job(job: tuple[str, int, int, Transcript | None]) -> Transcript | None:
+    try:
+        return parse(*job)
+    except FileNotFoundError:
+        return None
+
+
+def lines(f: BinaryIO, offset: int) -> Iterator[tuple[int, bytes]]:
+    """Yield (end offset, line) for each complete line of f after offset.
+
+    A final line without its newline is still being written and is left for
+    the next parse.
+    """
+    f.seek(offset)
+    for line in f:
+        if not line.endswith(b"\n"):
+            return
+        offset += len(line)
+        yield offset, line
+
+
+def wants(t: Transcript, line: bytes, kind: bytes | None) -> bool:
+    """Whether line, a record of type kind (see record_type()), must be
+    decoded to update t.
+
+    Most of a transcript's bytes are tool calls and results, which carry
+    nothing the index keeps, and decoding JSON is several times slower than
+    searching its bytes. A user turn after the first prompt needs only to be
+    counted, and what may be an assistant reply is decoded only if its model
+    looks new. Other lines are decoded if their type is unknown and they may
+    be a user or assistant record, or have no type at all.
+    """
+    if TITLE in line or (t.parent is None and FORKED_FROM in line):
+        return True
+    if kind == b"user":
+        return t.first_prompt is None
+    if kind is not None and kind != b"assistant":
+        return False
+    if ASSISTANT in line:
+        m = MODEL.search(line)
+        return m is None or m.group(1).decode(errors="replace") not in t.models
+    return kind is None and (USER in line or TYPE not in line)
+
+
+def record_type(line: bytes) -> bytes | None:
+    """Return the type of the record on line without decoding it.
+
+    Claude Code writes compact JSON, most records (user ones among them)
+    with their type among the first keys, ahead of any nested object (a
+    message, or a subagent's progress, which have types of their own). The
+    type of a line with no type, or with an object before its first one (an
+    assistant reply's message), is unknown: None.
+    """
+    i = line.find(TYPE)
+    if i == -1 or line.find(b"{", 1, i) != -1:
+        return None
+    start = i + len(TYPE)
+    return line[start : line.find(b'"', start)]
+
+
+def fingerprint(f: BinaryIO, offset: int) -> int:
+    """Checksum the bytes at the start of f and those just before offset."""
+    f.seek(0)
+    crc = zlib.crc32(f.read(min(offset, FINGERPRINT_SPAN)))
+    start = max(offset - FINGERPRINT_SPAN, 0)
+    f.seek(start)
+    return zlib.crc32(f.read(offset - start), crc)
+
+
+def update(t: Transcript, obj: dict) -> None:
+    forked = obj.get("forkedFrom")
+    if isinstance(forked, dict) and t.parent is None:
+        t.parent = forked.get("sessionId")
+    t.custom_title = obj.get("customTitle") or t.custom_title
+    t.ai_title = obj.get("aiTitle") or t.ai_title
+    msg = obj.get("message")
+    if not isinstance(msg, dict):
+        msg = {}
+    if obj.get("type") == "user":
+        t.turns += 1
+        if t.first_prompt is None:
+            t.first_prompt = first_text(msg.get("content"))
+    elif obj.get("type") == "assistant":
+        model = msg.get("model")
+        if model and model not in t.models:
+            t.models.append(model)
+
+
+def read_title(path: str) -> str | None:
+    """Return a transcript's title, searching backwards from its end.
+
+    The latest non-empty customTitle (set with /rename) wins, else the latest
+    aiTitle, as in a forward parse. Title records are usually near the end, so
+    the search seldom goes far; a transcript with no customTitle is searched
+    to its start, but only for the key's bytes, not line by line.
+    """
+    row = scan_titles((path, 0, 0, None))
+    return row[5] or row[6] if row else None
+
+
+def scan_titles(job: tuple[str, int, int, tuple | None]) -> tuple | None:
+    """Search a transcript for its titles, resuming after base if possible.
+
+    job is (path, mtime_ns, size, base), base being the transcript's previous
+    row of the titles table; only the complete lines after base's offset are
+    searched if the bytes up to it are unchanged. Returns the transcript's new
+    row, or None if it has gone.
+    """
+    path, mtime_ns, size, base = job
+    try:
+        with open(path, "rb") as f:
+            start, custom_title, ai_title = 0, None, None
+            if base is not None and base[3] <= size and fingerprint(f, base[3]) == base[4]:
+                start, custom_title, ai_title = base[3], base[5], base[6]
+            end = start
+            if os.fstat(f.fileno()).st_size > start:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    end = max(mm.rfind(b"\n") + 1, start)
+                    custom_title = latest_value(mm, "customTitle", start, end) or custom_title
+                    if custom_title is None:  # else the aiTitle is never shown
+                        ai_title = latest_value(mm, "aiTitle", start, end) or ai_title
+            return path, mtime_ns, size, end, fingerprint(f, end), custom_title, ai_title
+    except FileNotFoundError:
+        return None
+
+
+def latest_value(mm: mmap.mmap, key: str, start: int = 0, end: int | None = None) -> str | None:
+    """Return the value of key in the last line of mm[start:end] whose record
+    has it non-empty; start must be at the start of a line."""
+    needle = f'"{key}"'.encode()
+    end = len(mm) if end is None else end
+    while (i := mm.rfind(needle, start, end)) != -1:
+        line = mm.rfind(b"\n", 0, i) + 1
+        stop = mm.find(b"\n", i)
+        try:
+            obj = json.loads(mm[line : stop if stop != -1 else len(mm)])
+        except ValueError:
+            obj = None
+        value = obj.get(key) if isinstance(obj, dict) else None
+        if value and isinstance(value, str):
+            return value
+        end = line
+    return None
+
+
+def first_text(content: object) -> str | None:
+    if isinstance(content, str):
+        text = content
+    elif isinstance(content, list):
+        text = " ".join(x.get("text", "") for x in content if isinstance(x, dict))
+    else:
+        return None
+    text = text.strip().replace("\n", " ")
+    if not text or is_command_record(text):
+        return None
+    return text[:MAX_PROMPT]
@@ -0,0 +1,344 @@
+#!/usr/bin/env -S uv run --script
+#
+# /// script
+# requires-python = ">=3.12"
+# dependencies = ["pytest"]
+# ///
+"""Tests for claude_index, the transcript metadata index shared by the claude-* tools."""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+PYTHON_DIR = Path(__file__).parent.parent / "python"
+sys.path.insert(0, str(PYTHON_DIR))
+
+import claude_index  # noqa: E402
+
+
+def user(text: str) -> dict:
+    return {"type": "user", "message": {"role": "user", "content": text}}
+
+
+def assistant(model: str) -> dict:
+    return {"type": "assistant", "message": {"model": model, "content": []}}
+
+
+def write_transcript(path: Path, *records: dict, mode: str = "w", compact: bool = True) -> None:
+    """Write records as JSON lines, compact like Claude Code's unless compact is False."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    separators = (",", ":") if compact else None
+    with path.open(mode) as f:
+        for record in records:
+            f.write(json.dumps(record, separators=separators) + "\n")
+
+
+@pytest.fixture
+def home(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.delenv("XDG_CACHE_HOME", raising=False)
+    return tmp_path
+
+
+@pytest.fixture
+def project(home):
+    return home / ".claude" / "projects" / "-src-foo"
+
+
+class TestSessions:
+    def test_metadata(self, project):
+        write_transcript(
+            project / "aaaa1111.jsonl",
+            {"forkedFrom": {"sessionId": "bbbb2222", "messageUuid": "x"}},
+            user("<command-name>/model</command-name>"),
+            user("fix the\nparser"),
+            assistant("claude-opus"),
+            {"type": "user", "message": {"content": [{"type": "tool_result"}]}},
+            assistant("claude-haiku"),
+            assistant("claude-opus"),
+            {"aiTitle": "Parser fix"},
+            {"customTitle": "parser"},
+        )
+        [t] = claude_index.sessions(str(project))
+        assert (t.sid, t.parent, t.name, t.ai_title) == ("aaaa1111", "bbbb2222", "parser", "Parser fix")
+        assert t.first_prompt == "fix the parser"
+        assert t.turns == 3
+        assert t.models == ["claude-opus", "claude-haiku"]
+
+    def test_nested_user_messages_are_not_turns(self, project):
+        progress = {"type": "progress", "data": {"message": user("subagent prompt")}}
+        write_transcript(
+            project / "aaaa1111.jsonl",
+            user("first"),
+            progress,
+            {"parentUuid": "p", "data": {"message": user("subagent prompt")}, "type": "progress"},
+            user("second"),
+            {"type": "attachment", "text": 'a "type":"user" lookalike'},
+        )
+        [t] = claude_index.sessions(str(project))
+        assert (t.first_prompt, t.turns) == ("first", 2)
+
+    def test_non_compact_json(self, project):
+        write_transcript(
+            project / "aaaa1111.jsonl",
+            {"forkedFrom": {"sessionId": "bbbb2222"}},
+            user("hello"),
+            assistant("m1"),
+            user("again"),
+            assistant("m2"),
+            {"aiTitle": "Greeting"},
+            compact=False,
+        )
+        [t] = claude_index.sessions(str(project))
+        assert (t.parent, t.name, t.first_prompt, t.turns, t.models) == (
+            "bbbb2222",
+            "Greeting",
+            "hello",
+            2,
+            ["m1", "m2"],
+        )
+
+    def test_parallel_parse_matches_serial(self, project, monkeypatch):
+        for i in range(8):
+            write_transcript(
+                project / f"{i:04d}aaaa.jsonl",
+                {"forkedFrom": {"sessionId": f"{i - 1:04d}aaaa"}} if i else {"type": "system"},
+                *[user(f"prompt {i} {j}") for j in range(i + 1)],
+                assistant(f"m{i % 3}"),
+                {"customTitle": f"session {i}"},
+            )
+        serial = sorted(claude_index.sessions(str(project), workers=1), key=lambda t: t.sid)
+        os.unlink(claude_index.index_path())
+        monkeypatch.setattr(claude_index, "PARALLEL_MIN_BYTES", 0)
+        parallel = sorted(claude_index.sessions(str(project), workers=4), key=lambda t: t.sid)
+        assert parallel == serial
+        assert [t.turns for t in parallel] == list(range(1, 9))
+
+    def test_unchanged_transcripts_are_not_reparsed(self, project, monkeypatch):
+        write_transcript(project / "aaaa1111.jsonl", user("hello"), {"aiTitle": "Greeting"})
+        claude_index.sessions(str(project))
+
+        def fail(*args):
+            raise AssertionError("reparsed an unchanged transcript")
+
+        monkeypatch.setattr(claude_index, "parse", fail)
+        [t] = claude_index.sessions(str(project))
+        assert (t.name, t.first_prompt, t.turns) == ("Greeting", "hello", 1)
+
+    def test_changed_transcripts_are_reparsed(self, project):
+        path = project / "aaaa1111.jsonl"
+        write_transcript(path, user("hello"))
+        claude_index.sessions(str(project))
+        write_transcript(path, user("again"), {"customTitle": "renamed"}, mode="a")
+        [t] = claude_index.sessions(str(project))
+        assert (t.name, t.turns) == ("renamed", 2)
+
+    def test_appended_lines_are_parsed_incrementally(self, project, monkeypatch):
+        path = project / "aaaa1111.jsonl"
+        write_transcript(path, {"forkedFrom": {"sessionId": "bbbb2222"}}, user("hello"), assistant("m1"))
+        claude_index.sessions(str(project))
+        parsed = []
+        update = claude_index.update
+        monkeypatch.setattr(claude_index, "update", lambda t, obj: (parsed.append(obj), update(t, obj)))
+        write_transcript(path, user("again"), assistant("m2"), {"aiTitle": "Greeting"}, mode="a")
+        [t] = claude_index.sessions(str(project))
+        assert parsed == [{"type": "user"}, assistant("m2"), {"aiTitle": "Greeting"}]
+        assert (t.parent, t.name, t.first_prompt, t.turns, t.models) == (
+            "bbbb2222",
+            "Greeting",
+            "hello",
+            2,
+            ["m1", "m2"],
+        )
+        assert t.offset == path.stat().st_size
+
+    def test_partial_last_line_is_left_for_next_parse(self, project):
+        path = project / "aaaa1111.jsonl"
+        write_transcript(path, user("hello"))
+        with path.open("a") as f:
+            f.write('{"customTitle": "gree')
+        [t] = claude_index.sessions(str(project))
+        assert (t.name, t.offset) == (None, len(json.dumps(user("hello"), separators=(",", ":"))) + 1)
+        with path.open("a") as f:
+            f.write('ting"}\n')
+        [t] = claude_index.sessions(str(project))
+        assert t.name == "greeting"
+
+    def test_rewritten_transcripts_are_reparsed(self, project):
+        path = project / "aaaa1111.jsonl"
+        write_transcript(path, user("hello"), {"customTitle": "one"})
+        claude_index.sessions(str(project))
+        write_transcript(path, user("howdy"), {"customTitle": "two"}, user("more"))
+        [t] = claude_index.sessions(str(project))
+        assert (t.first_prompt, t.name, t.turns) == ("howdy", "two", 2)
+
+    def test_truncated_transcripts_are_reparsed(self, project):
+        path = project / "aaaa1111.jsonl"
+        write_transcript(path, user("hello"), user("again"), {"customTitle": "one"})
+        claude_index.sessions(str(project))
+        write_transcript(path, user("hello"))
+        [t] = claude_index.sessions(str(project))
+        assert (t.name, t.turns) == (None, 1)
+
+    def test_deleted_transcripts_are_dropped(self, project, home):
+        write_transcript(project / "aaaa1111.jsonl", user("one"))
+        write_transcript(project / "bbbb2222.jsonl", user("two"))
+        claude_index.sessions()
+        (project / "aaaa1111.jsonl").unlink()
+        assert [t.sid for t in claude_index.sessions()] == ["bbbb2222"]
+        db = claude_index.connect()
+        assert db.execute("SELECT count(*) FROM transcripts").fetchone()[0] == 1
+
+    def test_directory_scope(self, project, home):
+        other = home / ".claude" / "projects" / "-src-bar"
+        write_transcript(project / "aaaa1111.jsonl", user("one"))
+        write_transcript(other / "bbbb2222.jsonl", user("two"))
+        assert sorted(t.sid for t in claude_index.sessions()) == ["aaaa1111", "bbbb2222"]
+        assert [t.sid for t in claude_index.sessions(str(other))] == ["bbbb2222"]
+        # Indexing one project leaves the other's rows alone.
+        assert sorted(t.sid for t in claude_index.sessions()) == ["aaaa1111", "bbbb2222"]
+
+    def test_unwritable_cache(self, project, home, monkeypatch):
+        monkeypatch.setenv("XDG_CACHE_HOME", str(home / "not-a-dir"))
+        (home / "not-a-dir").write_text("")
+        write_transcript(project / "aaaa1111.jsonl", user("hello"))
+        [t] = claude_index.sessions(str(project))
+        assert t.first_prompt == "hello"
+
+
+class TestTitles:
+    def test_latest_custom_title_wins(self, tmp_path):
+        path = tmp_path / "aaaa1111.jsonl"
+        write_transcript(
+            path,
+            {"customTitle": "first"},
+            {"customTitle": "second"},
+            user('a prompt mentioning "customTitle": "nope"'),
+            {"aiTitle": "generated"},
+            {"customTitle": ""},
+        )
+        assert claude_index.read_title(str(path)) == "second"
+
+    def test_ai_title_without_custom_title(self, tmp_path):
+        path = tmp_path / "aaaa1111.jsonl"
+        write_transcript(path, {"aiTitle": "old"}, user("hi"), {"aiTitle": "new"}, user("more"))
+        with path.open("a") as f:
+            f.write('{"aiTitle": "partial')
+        assert claude_index.read_title(str(path)) == "new"
+
+    def test_untitled(self, tmp_path):
+        empty, untitled = tmp_path / "empty.jsonl", tmp_path / "untitled.jsonl"
+        empty.write_text("")
+        write_transcript(untitled, user("hi"))
+        assert claude_index.read_title(str(empty)) is None
+        assert claude_index.read_title(str(untitled)) is None
+        assert claude_index.read_title(str(tmp_path / "missing.jsonl")) is None
+
+    def test_titles_use_index_when_current(self, project, monkeypatch):
+        indexed, changed = project / "aaaa1111.jsonl", project / "bbbb2222.jsonl"
+        write_transcript(indexed, user("one"), {"aiTitle": "indexed"})
+        write_transcript(changed, user("two"), {"aiTitle": "before"})
+        claude_index.sessions(str(project))
+        write_transcript(changed, {"customTitle": "after"}, mode="a")
+        scanned = self.record_scans(monkeypatch)
+        titles = claude_index.titles([str(indexed), str(changed), str(project / "gone.jsonl")])
+        assert titles == {str(indexed): "indexed", str(changed): "after"}
+        assert [job[0] for job in scanned] == [str(changed)]
+
+    def test_titles_found_are_kept(self, project, monkeypatch):
+        titled, untitled = project / "aaaa1111.jsonl", project / "bbbb2222.jsonl"
+        write_transcript(titled, user("one"), {"aiTitle": "found"})
+        write_transcript(untitled, user("two"))
+        paths = [str(titled), str(untitled)]
+        assert claude_index.titles(paths) == {str(titled): "found", str(untitled): None}
+
+        scanned = self.record_scans(monkeypatch)
+        assert claude_index.titles(paths) == {str(titled): "found", str(untitled): None}
+        assert scanned == []
+
+        # An append is searched from where the last search ended; a rewrite from the start.
+        write_transcript(untitled, user("three"), {"aiTitle": "late"}, mode="a")
+        write_transcript(titled, {"customTitle": "renamed"}, mode="a")
+        assert claude_index.titles(paths) == {str(titled): "renamed", str(untitled): "late"}
+        assert [job[0] for job in scanned] == paths
+        assert all(base is not None for _, _, _, base in scanned)
+        db = claude_index.connect()
+        assert dict(db.execute("SELECT path, offset FROM titles")) == {p: os.path.getsize(p) for p in paths}
+        db.close()
+        write_transcript(titled, user("rewritten"))
+        assert claude_index.titles(paths)[str(titled)] is None
+
+        titled.unlink()
+        claude_index.titles([str(untitled)])
+        db = claude_index.connect()
+        assert [path for path, in db.execute("SELECT path FROM titles")] == [str(untitled)]
+        db.close()
+
+    @staticmethod
+    def record_scans(monkeypatch) -> list:
+        scanned = []
+        scan_titles = claude_index.scan_titles
+        monkeypatch.setattr(claude_index, "scan_titles", lambda job: (scanned.append(job), scan_titles(job))[1])
+        return scanned
+
+
+class TestTools:
+    def run(self, home: Path, script: str, *args: str) -> subprocess.CompletedProcess:
+        env = {**os.environ, "HOME": str(home), "COLUMNS": "200"}
+        env.pop("XDG_CACHE_HOME", None)
+        return subprocess.run(
+            [sys.executable, str(PYTHON_DIR / script), *args],
+            capture_output=True,
+            text=True,
+            env=env,
+        )
+
+    def test_session_prompts_by_name(self, project, home):
+        write_transcript(project / "aaaa1111.jsonl", user("first"), user("second"), {"customTitle": "alpha"})
+        write_transcript(project / "bbbb2222.jsonl", user("other"), {"aiTitle": "Beta"})
+        result = self.run(home, "claude-session-prompts", "ALPHA")
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.split() == ["1", "first", "2", "second"]
+
+    def test_session_models_ambiguous_name(self, project, home):
+        write_transcript(project / "aaaa1111.jsonl", user("first"), {"customTitle": "alpha one"})
+        write_transcript(project / "bbbb2222.jsonl", user("other"), {"customTitle": "alpha two"})
+        result = self.run(home, "claude-session-models", "alpha")
+        assert result.returncode == 1
+        assert "2 sessions match that name" in result.stderr
+
+    def test_prompts_starting_with_markup_are_kept(self, project, home):
+        write_transcript(
+            project / "aaaa1111.jsonl",
+            user("<command-name>/clear</command-name>"),
+            user("<bash-input>ls</bash-input>"),
+            user("<div>not centred</div>"),
+        )
+        [t] = claude_index.sessions(str(project))
+        assert t.first_prompt == "<div>not centred</div>"
+        result = self.run(home, "claude-session-prompts", "aaaa")
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.split() == ["1", "<div>not", "centred</div>"]
+
+    def test_project_tree(self, project, home):
+        write_transcript(project / "aaaa1111.jsonl", user("root prompt"), {"customTitle": "root"})
+        write_transcript(
+            project / "bbbb2222.jsonl",
+            {"forkedFrom": {"sessionId": "aaaa1111", "messageUuid": "x"}},
+            user("child prompt"),
+        )
+        result = self.run(home, "claude-project-tree", "/src/foo")
+        assert result.returncode == 0, result.stderr
+        lines = result.stdout.splitlines()
+        assert lines[-2] == "└─ [root] aaaa1111  (1 turns)  root prompt"
+        assert lines[-1] == "   └─ bbbb2222  (1 turns)  child prompt"
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
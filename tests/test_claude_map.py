@@ -0,0 +1,221 @@
+#!/usr/bin/env -S uv run --script
+#
+# /// script
+# requires-python = ">=3.12"
+# dependencies = ["pytest"]
+# ///
+"""Tests for claude-map, run against a stand-in `claude` executable."""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import signal
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+SCRIPT_PATH = Path(__file__).parent.parent / "python" / "claude-map"
+
+# Answers after the number of seconds in the session id's first field,
+# logging the session id; a session id starting "hang" starts a grandchild
+# that never exits, recording its pid.
+FAKE_CLAUDE = """\
+#!/usr/bin/env python3
+import json, os, subprocess, sys, time
+sid = sys.argv[sys.argv.index("--resume") + 1]
+with open(os.environ["CLAUDE_CALLS"], "a") as f:
+    f.write(f"{sid}\\n")
+if sid.startswith("hang"):
+    child = subprocess.Popen(["sleep", "600"])
+    with open(os.environ["HANG_PIDS"], "a") as f:
+        f.write(f"{child.pid}\\n")
+    child.wait()
+time.sleep(float(sid.split("-")[0]))
+usage = {"input_tokens": 10, "cache_read_input_tokens": 1000, "output_tokens": 20}
+print(json.dumps({"result": f"answer from {sid}", "total_cost_usd": 0.01, "usage": usage}))
+"""
+
+
+@pytest.fixture
+def env(tmp_path):
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    claude = bin_dir / "claude"
+    claude.write_text(FAKE_CLAUDE)
+    claude.chmod(0o755)
+    work = tmp_path / "work"
+    work.mkdir()
+    env = {
+        **os.environ,
+        "HOME": str(tmp_path),
+        "PATH": f"{bin_dir}:{os.environ['PATH']}",
+        "HANG_PIDS": str(tmp_path / "hang.pids"),
+        "CLAUDE_CALLS": str(tmp_path / "calls"),
+        "COLUMNS": "80",
+    }
+    env.pop("XDG_CACHE_HOME", None)
+    return env, work
+
+
+def add_sessions(work: Path, home: str, *sids: str) -> None:
+    """Create transcripts for sids, the first being the most recent."""
+    project = Path(home) / ".claude" / "projects" / re.sub(r"[^a-zA-Z0-9]", "-", str(work))
+    project.mkdir(parents=True, exist_ok=True)
+    now = time.time()
+    for i, sid in enumerate(sids):
+        path = project / f"{sid}.jsonl"
+        path.write_text('{"type":"user","message":{"content":"hi"}}\n')
+        os.utime(path, (now - i, now - i))
+
+
+def headers(stdout: str) -> list[str]:
+    return re.findall(r"claude -r (\S+)", re.sub(r"\x1b\[[0-9;]*m", "", stdout))
+
+
+def test_answers_are_ordered_by_recency(env):
+    env, work = env
+    add_sessions(work, env["HOME"], "0.6-a", "0-b", "0.3-c")
+    result = subprocess.run(
+        [str(SCRIPT_PATH), "3", "hello"], cwd=work, env=env, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
+    assert headers(result.stdout) == ["0.6-a", "0-b", "0.3-c"]
+    assert "answer from 0-b" in result.stdout
+
+
+def test_as_completed(env):
+    env, work = env
+    add_sessions(work, env["HOME"], "0.6-a", "0-b", "0.3-c")
+    result = subprocess.run(
+        [str(SCRIPT_PATH), "3", "hello", "--as-completed"],
+        cwd=work,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    assert headers(result.stdout) == ["0-b", "0.3-c", "0.6-a"]
+
+
+def test_timeout_kills_process_group(env):
+    env, work = env
+    add_sessions(work, env["HOME"], "hang-a", "0-b")
+    start = time.monotonic()
+    result = subprocess.run(
+        [str(SCRIPT_PATH), "2", "hello", "--timeout", "1"],
+        cwd=work,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    assert time.monotonic() - start < 30
+    assert "<timed out after 1s>" in result.stdout
+    assert "answer from 0-b" in result.stdout
+    assert_dead(env["HANG_PIDS"])
+
+
+def test_interrupt_kills_sessions_and_prints_answers_in(env):
+    env, work = env
+    add_sessions(work, env["HOME"], "hang-a", "0-b")
+    proc = subprocess.Popen(
+        [str(SCRIPT_PATH), "2", "hello"],
+        cwd=work,
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    deadline = time.monotonic() + 30
+    while not os.path.exists(env["HANG_PIDS"]) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    time.sleep(0.5)
+    proc.send_signal(signal.SIGINT)
+    stdout, stderr = proc.communicate(timeout=30)
+    assert proc.returncode == 130
+    assert "interrupted: 1/2 session(s) answered" in stderr
+    assert headers(stdout) == ["0-b"]
+    assert_dead(env["HANG_PIDS"])
+
+
+def test_cache(env):
+    env, work = env
+    add_sessions(work, env["HOME"], "0-a", "0-b")
+    calls = Path(env["CLAUDE_CALLS"])
+
+    def run(*args: str) -> str:
+        result = subprocess.run(
+            [str(SCRIPT_PATH), "2", "hello", *args], cwd=work, env=env, capture_output=True, text=True
+        )
+        assert result.returncode == 0, result.stderr
+        return result.stdout
+
+    first = run()
+    assert sorted(calls.read_text().split()) == ["0-a", "0-b"]
+    calls.write_text("")
+    second = run()
+    assert calls.read_text() == ""
+    assert headers(second) == headers(first)
+    assert second.count("(cached)") == 2
+    assert "answer from 0-a" in second
+
+    # A changed transcript misses; --refresh and --allow-writes bypass the cache.
+    transcript = next((Path(env["HOME"]) / ".claude" / "projects").glob("*/0-b.jsonl"))
+    with transcript.open("a") as f:
+        f.write('{"type":"user","message":{"content":"more"}}\n')
+    run()
+    assert calls.read_text().split() == ["0-b"]
+    calls.write_text("")
+    run("--refresh")
+    assert sorted(calls.read_text().split()) == ["0-a", "0-b"]
+    calls.write_text("")
+    run("--allow-writes")
+    assert sorted(calls.read_text().split()) == ["0-a", "0-b"]
+
+
+def test_metrics(env, tmp_path):
+    env, work = env
+    add_sessions(work, env["HOME"], "0.2-a", "0-b", "hang-c")
+    metrics = tmp_path / "metrics.jsonl"
+    result = subprocess.run(
+        [str(SCRIPT_PATH), "3", "hello", "--timeout", "1", "--metrics", str(metrics)],
+        cwd=work,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    records = [json.loads(line) for line in metrics.read_text().splitlines()]
+    assert [r["sid"] for r in records] == ["0.2-a", "0-b", "hang-c"]
+    a, b, c = records
+    assert (a["ok"], a["exit_status"], a["tokens_in"], a["tokens_out"], a["cost"]) == (True, 0, 1010, 20, 0.01)
+    assert a["seconds"] >= 0.2 and a["done"] >= a["seconds"]
+    assert (c["ok"], c["exit_status"], c["cost"]) == (False, -signal.SIGKILL, None)
+    assert c["seconds"] >= 1
+    assert "3/3 answered" in result.stderr
+    assert "1 failed" in result.stderr
+    assert "2,020 in  ·  40 out" in result.stderr
+    assert "0.0200 USD" in result.stderr
+    assert re.search(r"p50 0\.\ds  p95 1\.\ds", result.stderr)
+    assert_dead(env["HANG_PIDS"])
+
+
+def assert_dead(pid_file: str) -> None:
+    [pid] = map(int, Path(pid_file).read_text().split())
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return
+        time.sleep(0.05)
+    os.kill(pid, signal.SIGKILL)
+    pytest.fail(f"grandchild {pid} outlived claude-map")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
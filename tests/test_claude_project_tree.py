@@ -0,0 +1,77 @@
+#!/usr/bin/env -S uv run --script
+#
+# /// script
+# requires-python = ">=3.12"
+# dependencies = ["pytest"]
+# ///
+"""Tests for claude-project-tree: render the fork tree of Claude Code sessions."""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+SCRIPT_PATH = Path(__file__).parent.parent / "python" / "claude-project-tree"
+DAY = 86400
+
+
+def write_session(project: Path, sid: str, parent: str | None, age: float) -> None:
+    records = [{"type": "user", "message": {"role": "user", "content": f"prompt {sid}"}}]
+    if parent:
+        records.insert(0, {"forkedFrom": {"sessionId": parent, "messageUuid": "x"}})
+    path = project / f"{sid}.jsonl"
+    path.write_text("".join(json.dumps(r, separators=(",", ":")) + "\n" for r in records))
+    mtime = time.time() - age
+    os.utime(path, (mtime, mtime))
+
+
+def run(home: Path, *args: str) -> list[str]:
+    env = {**os.environ, "HOME": str(home), "COLUMNS": "100"}
+    env.pop("XDG_CACHE_HOME", None)
+    result = subprocess.run(
+        [sys.executable, str(SCRIPT_PATH), "/src/foo", *args],
+        capture_output=True,
+        text=True,
+        env=env,
+    )
+    assert result.returncode == 0, result.stderr
+    return result.stdout.splitlines()
+
+
+def project(home: Path) -> Path:
+    path = home / ".claude" / "projects" / "-src-foo"
+    path.mkdir(parents=True)
+    return path
+
+
+def test_since_keeps_ancestors_of_recent_sessions(tmp_path):
+    p = project(tmp_path)
+    write_session(p, "root0000", None, 30 * DAY)
+    write_session(p, "old00000", "root0000", 20 * DAY)
+    write_session(p, "mid00000", "root0000", 10 * DAY)
+    write_session(p, "new00000", "mid00000", 0)
+    write_session(p, "lone0000", None, 5 * DAY)
+    lines = run(tmp_path, "--since", "1 week")
+    assert lines[1] == "(4/5 sessions)"
+    assert [line.split("  (")[0] for line in lines[3:]] == [
+        "└─ root0000",
+        "   └─ mid00000",
+        "      └─ new00000",
+        "└─ lone0000",
+    ]
+
+
+def test_deep_fork_chain(tmp_path):
+    p = project(tmp_path)
+    depth = 3000
+    for i in range(depth):
+        write_session(p, f"{i:08d}", f"{i - 1:08d}" if i else None, DAY * (depth - i) / depth)
+    lines = run(tmp_path, "--since", "1h")
+    assert lines[1] == f"({depth}/{depth} sessions)"
+    assert len(lines) == 3 + depth
+    assert lines[3].startswith("└─ 00000000  (1 turns)  prompt 00000000")
+    assert lines[-1] == " " * 99 + "…"
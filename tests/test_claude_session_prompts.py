@@ -0,0 +1,139 @@
+#!/usr/bin/env -S uv run --script
+#
+# /// script
+# requires-python = ">=3.12"
+# dependencies = ["pytest"]
+# ///
+"""Tests for claude-session-prompts --search."""
+
+from __future__ import annotations
+
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+from importlib.machinery import SourceFileLoader
+from pathlib import Path
+
+import pytest
+
+SCRIPT_PATH = Path(__file__).parent.parent / "python" / "claude-session-prompts"
+sys.path.insert(0, str(SCRIPT_PATH.parent))
+
+
+def user(text: str, ts: str, **extra) -> dict:
+    return {"type": "user", "timestamp": ts, "message": {"role": "user", "content": text}, **extra}
+
+
+def tool_result(text: str, ts: str) -> dict:
+    content = [{"type": "tool_result", "tool_use_id": "t", "content": text}]
+    return {"type": "user", "timestamp": ts, "message": {"role": "user", "content": content}}
+
+
+def write(path: Path, *records: dict, mode: str = "w") -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open(mode) as f:
+        for r in records:
+            f.write(json.dumps(r, separators=(",", ":")) + "\n")
+
+
+@pytest.fixture
+def home(tmp_path):
+    return tmp_path
+
+
+def search(home: Path, text: str, *args: str) -> list[str]:
+    env = {**os.environ, "HOME": str(home), "COLUMNS": "200"}
+    env.pop("XDG_CACHE_HOME", None)
+    result = subprocess.run(
+        [sys.executable, str(SCRIPT_PATH), "--search", text, *args],
+        capture_output=True,
+        text=True,
+        env=env,
+    )
+    assert result.returncode == 0, result.stderr
+    return result.stdout.splitlines()
+
+
+def projects(home: Path) -> Path:
+    return home / ".claude" / "projects"
+
+
+def test_search_across_projects(home):
+    write(
+        projects(home) / "-src-foo" / "aaaa1111.jsonl",
+        user("Refactor the Parser module", "2026-01-01T10:00:00Z"),
+        tool_result("parser output the search must not see", "2026-01-01T10:01:00Z"),
+        user("<command-name>/parser</command-name>", "2026-01-01T10:02:00Z"),
+        user("parser meta", "2026-01-01T10:03:00Z", isMeta=True),
+        {"customTitle": "refactor"},
+    )
+    write(
+        projects(home) / "-src-bar" / "bbbb2222.jsonl",
+        user("why does the parser\nhang?", "2026-02-01T09:30:00Z"),
+        user("unrelated", "2026-02-01T09:40:00Z"),
+    )
+    assert search(home, "PARSER") == [
+        "2026-02-01T09:30  bbbb2222  why does the parser hang?",
+        "2026-01-01T10:00  aaaa1111  [refactor]  Refactor the Parser module",
+    ]
+    assert search(home, "parser", "--limit", "1") == [
+        "2026-02-01T09:30  bbbb2222  why does the parser hang?",
+    ]
+    assert search(home, "no such prompt") == []
+
+
+def test_index_follows_transcript_changes(home):
+    path = projects(home) / "-src-foo" / "aaaa1111.jsonl"
+    write(path, user("first question", "2026-01-01T10:00:00Z"))
+    assert len(search(home, "question")) == 1
+    write(path, user("second question", "2026-01-01T11:00:00Z"), mode="a")
+    assert [line.split("  ")[-1] for line in search(home, "question")] == [
+        "second question",
+        "first question",
+    ]
+    write(path, user("rewritten question", "2026-01-01T12:00:00Z"))
+    assert [line.split("  ")[-1] for line in search(home, "question")] == ["rewritten question"]
+    path.unlink()
+    assert search(home, "question") == []
+
+
+def test_short_and_special_patterns(home):
+    write(
+        projects(home) / "-src-foo" / "aaaa1111.jsonl",
+        user("is 5% of x_y ok", "2026-01-01T10:00:00Z"),
+        user("is 50 of xzy ok", "2026-01-01T11:00:00Z"),
+        user('say "hi" there', "2026-01-01T12:00:00Z"),
+    )
+    assert [line.split("  ")[-1] for line in search(home, "5%")] == ["is 5% of x_y ok"]
+    assert [line.split("  ")[-1] for line in search(home, "x_y")] == ["is 5% of x_y ok"]
+    assert [line.split("  ")[-1] for line in search(home, '"hi"')] == ['say "hi" there']
+
+
+@pytest.mark.parametrize("cache", ["dir", "unusable"])
+def test_search_without_trigram_tokenizer(home, monkeypatch, capsys, cache):
+    """Without the trigram tokenizer (SQLite < 3.34) prompts are scanned with LIKE."""
+    loader = SourceFileLoader("claude_session_prompts", str(SCRIPT_PATH))
+    module = importlib.util.module_from_spec(importlib.util.spec_from_loader(loader.name, loader))
+    loader.exec_module(module)
+    monkeypatch.setattr(module, "PROMPTS_FTS", module.PROMPTS_FTS.replace("trigram", "no_such_tokenizer"))
+    monkeypatch.setenv("HOME", str(home))
+    monkeypatch.setenv("XDG_CACHE_HOME", str(home / "cache"))
+    if cache == "unusable":
+        (home / "cache").write_text("")
+    write(
+        projects(home) / "-src-foo" / "aaaa1111.jsonl",
+        user("Refactor the Parser module", "2026-01-01T10:00:00Z"),
+        user("is 5% of x_y ok", "2026-01-01T11:00:00Z"),
+    )
+    module.search("parser", 50, 200)
+    module.search("5%", 50, 200)
+    assert capsys.readouterr().out.splitlines() == [
+        "2026-01-01T10:00  aaaa1111  Refactor the Parser module",
+        "2026-01-01T11:00  aaaa1111  is 5% of x_y ok",
+    ]
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
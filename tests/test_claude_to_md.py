@@ -8,6 +8,8 @@
 
 from __future__ import annotations
 
+import json
+import os
 import subprocess
 from pathlib import Path
 
@@ -38,9 +40,9 @@ Your second question — yes for the logical machine, no for the physical machin
 """
 
 
-def run(input_text: str) -> str:
+def run(input_text: str = "", *args: str, env: dict | None = None) -> str:
     result = subprocess.run(
-        [str(SCRIPT_PATH)], input=input_text, capture_output=True, text=True
+        [str(SCRIPT_PATH), *args], input=input_text, capture_output=True, text=True, env=env
     )
     assert result.returncode == 0, result.stderr
     return result.stdout
@@ -66,3 +68,64 @@ def test_multi_paragraph_prompt():
 def test_no_trailing_whitespace_in_output():
     out = run(TRANSCRIPT)
     assert all(line == line.rstrip() for line in out.splitlines())
+
+
+def record(kind: str, content, **extra) -> dict:
+    return {"type": kind, "message": {"role": kind, "content": content}, **extra}
+
+
+SESSION = [
+    record("user", "para one\nstill one\n\npara two"),
+    record("assistant", [{"type": "thinking", "thinking": "hmm"}, {"type": "text", "text": "Looking."}]),
+    record("assistant", [{"type": "tool_use", "id": "t", "name": "Read", "input": {}}]),
+    record("user", [{"type": "tool_result", "tool_use_id": "t", "content": "file body"}]),
+    record("assistant", [{"type": "text", "text": "It **works**.\n\n- a\n- b"}]),
+    record("user", "<command-name>/clear</command-name>"),
+    record("user", "<local-command-stdout></local-command-stdout>"),
+    record("user", "injected", isMeta=True),
+    record("user", "<div>why is this\n\nnot centred?</div>"),
+    record("assistant", [{"type": "text", "text": "done"}]),
+]
+
+SESSION_MD = """\
+> para one
+> still one
+>
+> para two
+
+Looking.
+
+It **works**.
+
+- a
+- b
+
+> <div>why is this
+>
+> not centred?</div>
+
+done
+"""
+
+
+def write_session(path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("".join(json.dumps(r) + "\n" for r in SESSION) + "not json\n")
+
+
+def test_transcript_path(tmp_path):
+    path = tmp_path / "session.jsonl"
+    write_session(path)
+    assert run("", str(path)) == SESSION_MD
+
+
+def test_session_id(tmp_path):
+    write_session(tmp_path / ".claude" / "projects" / "-src-foo" / "aaaa1111-2222.jsonl")
+    env = {**os.environ, "HOME": str(tmp_path)}
+    env.pop("XDG_CACHE_HOME", None)
+    assert run("", "aaaa", env=env) == SESSION_MD
+    result = subprocess.run(
+        [str(SCRIPT_PATH), "ffff"], capture_output=True, text=True, env=env
+    )
+    assert result.returncode != 0
+    assert "no session matching 'ffff'" in result.stderr
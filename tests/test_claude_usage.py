@@ -1,14 +1,20 @@
 from __future__ import annotations
 
 import importlib.util
-from datetime import date
+import json
+import os
+from datetime import date, datetime, timezone
 from importlib.machinery import SourceFileLoader
 from pathlib import Path
 import sys
+import tempfile
 import unittest
+from unittest import mock
 
 
-SCRIPT_PATH = Path(__file__).parent.parent / "python" / "claude-usage"
+PYTHON_DIR = Path(__file__).parent.parent / "python"
+SCRIPT_PATH = PYTHON_DIR / "claude-usage-graph"
+sys.path.insert(0, str(PYTHON_DIR))
 
 
 def load_module():
@@ -21,40 +27,97 @@ def load_module():
     return module
 
 
+def reply(message_id, timestamp, model, block, **usage):
+    return {
+        "parentUuid": "p",
+        "message": {
+            "model": model,
+            "id": message_id,
+            "type": "message",
+            "role": "assistant",
+            "content": [{"type": "text", "text": f"block {block}"}],
+            "usage": usage,
+        },
+        "requestId": f"req_{message_id}",
+        "type": "assistant",
+        "timestamp": timestamp,
+    }
+
+
+def write_transcript(path, records, separators=(",", ":"), mode="w"):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open(mode) as f:
+        f.write("".join(json.dumps(r, separators=separators) + "\n" for r in records))
+
+
+def local(timestamp):
+    return datetime.fromisoformat(timestamp).replace(tzinfo=timezone.utc).astimezone().date().isoformat()
+
+
 class TestCcusageMonthGraph(unittest.TestCase):
-    def test_build_ccusage_commands_always_use_npx(self):
+    def test_load_usage_sums_and_prices_replies_once(self):
         module = load_module()
 
-        commands = module.build_ccusage_commands(
-            since=date(2026, 4, 1),
-            until=date(2026, 4, 11),
-            locale=None,
-            mode="auto",
-            project=None,
-            offline=True,
+        opus = "claude-opus-4-1-20250805"
+        sonnet = "claude-sonnet-4-5-20250929"
+        tool_result = {
+            "type": "user",
+            "message": {"role": "user", "content": [{"type": "tool_result"}]},
+            "toolUseResult": {"usage": {"input_tokens": 999}},
+            "timestamp": "2026-04-01T12:00:00Z",
+        }
+        parent = [
+            reply("msg_1", "2026-04-01T12:00:00Z", opus, 1, input_tokens=1000, output_tokens=100),
+            # Written again for each content block of the same reply.
+            reply("msg_1", "2026-04-01T12:00:00Z", opus, 2, input_tokens=1000, output_tokens=100),
+            tool_result,
+            reply(
+                "msg_2",
+                "2026-04-02T12:00:00Z",
+                sonnet,
+                1,
+                input_tokens=10,
+                output_tokens=20,
+                cache_creation_input_tokens=3000,
+                cache_read_input_tokens=50000,
+                cache_creation={"ephemeral_1h_input_tokens": 1000},
+            ),
+            reply("msg_3", "2026-03-31T12:00:00Z", opus, 1, input_tokens=7, output_tokens=7),
+        ]
+        # A fork repeats its parent's history before its own replies.
+        fork = [*parent[:3], reply("msg_4", "2026-04-01T13:00:00Z", "claude-unknown", 1, output_tokens=5)]
+
+        with tempfile.TemporaryDirectory() as home:
+            projects = Path(home) / ".claude" / "projects"
+            write_transcript(projects / "-src-one" / "aaaa.jsonl", parent)
+            write_transcript(projects / "-src-two" / "bbbb.jsonl", fork, separators=None)
+            os.utime(projects / "-src-one" / "aaaa.jsonl", (0, datetime.now().timestamp() - 60))
+            with mock.patch.dict(os.environ, {"HOME": home, "XDG_CACHE_HOME": f"{home}/.cache"}):
+                payload = module.load_usage(date(2026, 4, 1), date(2026, 4, 30))
+
+        one, two = payload["projects"]["-src-one"], payload["projects"]["-src-two"]
+        self.assertEqual([row["date"] for row in one], [local("2026-04-01T12:00"), local("2026-04-02T12:00")])
+        self.assertEqual(
+            {key: one[0][key] for key in ("inputTokens", "outputTokens", "totalTokens", "cacheReadTokens")},
+            {"inputTokens": 1000, "outputTokens": 100, "totalTokens": 1100, "cacheReadTokens": 0},
+        )
+        self.assertEqual(one[0]["totalCost"], module.Decimal("0.0225"))
+        # 10 x $3 + 20 x $15 + 2000 x $3.75 + 1000 x $6 + 50000 x $0.30, per million.
+        self.assertEqual(one[1]["cacheCreationTokens"], 3000)
+        self.assertEqual(one[1]["totalTokens"], 53030)
+        self.assertEqual(one[1]["totalCost"], module.Decimal("0.02883"))
+        self.assertEqual(
+            [(row["date"], row["outputTokens"], row["totalCost"]) for row in two],
+            [(local("2026-04-01T13:00"), 5, module.Decimal("0"))],
         )
 
+        points = module.build_daily_points(
+            payload, "outputTokens", date(2026, 4, 1), date(2026, 4, 30), date(2026, 4, 30)
+        )
+        day = next(point for point in points if point.day.isoformat() == local("2026-04-01T12:00"))
         self.assertEqual(
-            commands,
-            [
-                [
-                    "npx",
-                    "-y",
-                    "ccusage",
-                    "daily",
-                    "--json",
-                    "--instances",
-                    "--since",
-                    "20260401",
-                    "--until",
-                    "20260411",
-                    "--mode",
-                    "auto",
-                    "--order",
-                    "asc",
-                    "--offline",
-                ]
-            ],
+            [(item.project, item.value) for item in day.projects],
+            [("/src-one", 100), ("/src-two", 5)],
         )
 
     def test_build_daily_points_aggregates_projects_and_fills_month(self):
@@ -124,31 +187,101 @@ class TestCcusageMonthGraph(unittest.TestCase):
             date(2026, 4, 2),
         )
 
-        self.assertEqual(model["todayDay"], 2)
+        self.assertEqual(model["period"], "day")
+        self.assertEqual(model["dates"], ["2026-04-01", "2026-04-02", "2026-04-03"])
         self.assertEqual(model["totalLabel"], "$5.00")
+        self.assertEqual(model["predictionTitle"], "Projected month end")
         self.assertEqual(model["predictionEndLabel"], "$7.50")
         self.assertEqual(model["targetEndLabel"], "$1,000.00")
-        self.assertEqual(model["daily"][2]["cumulative"], None)
+        self.assertEqual(model["values"], [2.0, 3.0, 0.0])
+        self.assertEqual(model["cumulative"], [2.0, 5.0, None])
         self.assertEqual(model["prediction"], [2.5, 5.0, 7.5])
         self.assertEqual(model["target"], [333.3333, 666.6667, 1000.0])
+        self.assertEqual(model["projectNames"], ["/one", "/two"])
+        self.assertEqual(model["projects"], [[0, 2.0], [1, 3.0], []])
+
+    def test_long_ranges_are_downsampled(self):
+        module = load_module()
+
+        self.assertEqual(module.choose_period(date(2026, 7, 1), date(2026, 9, 30)), "day")
+        self.assertEqual(module.choose_period(date(2025, 1, 1), date(2026, 9, 30)), "week")
+        self.assertEqual(module.choose_period(date(2023, 1, 1), date(2026, 9, 30)), "month")
+
+        payload = {
+            "projects": {
+                "-src-one": [
+                    {"date": "2025-01-01", "totalCost": "1"},
+                    {"date": "2025-12-31", "totalCost": "2"},
+                    {"date": "2026-02-14", "totalCost": "4"},
+                ],
+                "-src-two": [{"date": "2025-01-31", "totalCost": "8"}],
+            }
+        }
+        today = date(2026, 2, 14)
+        points = module.build_daily_points(payload, "totalCost", date(2025, 1, 1), date(2026, 3, 31), today)
+        model = module.build_chart_model(points, "totalCost", "2025-01-01 to 2026-03-31", today, "month")
+
+        self.assertEqual(len(model["dates"]), 15)
+        self.assertEqual(model["dates"][:2], ["2025-01-01", "2025-02-01"])
+        self.assertEqual(model["values"][:2], [9.0, 0.0])
+        self.assertEqual(model["values"][11:], [2.0, 0.0, 4.0, 0.0])
+        self.assertEqual(model["cumulative"][-3:], [11.0, 15.0, None])
+        self.assertEqual(model["projectNames"], ["/src-two", "/src-one"])
+        self.assertEqual(model["projects"][0], [0, 8.0, 1, 1.0])
+        self.assertEqual(model["targetMonths"], 15)
+        self.assertEqual(model["target"][-1], 15000.0)
+        self.assertEqual(model["predictionTitle"], "Projected range end")
+
+        weekly = module.build_chart_model(points, "totalCost", "", today, "week")
+        # Weeks start on Monday; 2025-01-01 is a Wednesday.
+        self.assertEqual(weekly["dates"][:2], ["2024-12-30", "2025-01-06"])
+        self.assertEqual(weekly["values"][4], 8.0)
+
+    def test_parse_range(self):
+        module = load_module()
+
+        today = date(2026, 10, 18)
+        self.assertEqual(
+            module.parse_range("2026-07", "2026-09", today), (date(2026, 7, 1), date(2026, 9, 30))
+        )
+        self.assertEqual(module.parse_range("2024-02-10", None, today), (date(2024, 2, 10), today))
+        with self.assertRaises(SystemExit):
+            module.parse_range(None, "2026-09", today)
+        with self.assertRaises(SystemExit):
+            module.parse_range("2026-09-31", None, today)
+        with self.assertRaises(SystemExit):
+            module.parse_range("2026-09", "2026-08", today)
+
+    def test_offline_is_still_accepted(self):
+        module = load_module()
+
+        with mock.patch.object(sys, "argv", ["claude-usage-graph", "--offline", "--month", "2026-09"]):
+            args = module.parse_args()
+        self.assertEqual(args.month, "2026-09")
 
     def test_render_html_contains_embedded_model(self):
         module = load_module()
 
         html = module.render_html(
             {
-                "month": "2026-04",
+                "title": "2026-04",
                 "metric": "totalCost",
                 "metricLabel": "Cumulative cost",
-                "daysInMonth": 3,
-                "todayDay": 2,
+                "period": "day",
+                "axisLabel": "Day of month (2026-04)",
                 "totalLabel": "$5.00",
+                "predictionTitle": "Projected month end",
                 "predictionEndLabel": "$7.50",
                 "targetEndLabel": "$1,000.00",
+                "targetMonths": 1,
                 "yMax": 10.0,
-                "daily": [],
+                "dates": ["2026-04-01", "2026-04-02", "2026-04-03"],
+                "values": [2.0, 3.0, 0.0],
+                "cumulative": [2.0, 5.0, None],
                 "prediction": [2.5, 5.0, 7.5],
                 "target": [333.3333, 666.6667, 1000.0],
+                "projectNames": [],
+                "projects": [[], [], []],
             }
         )
 
@@ -159,6 +292,89 @@ class TestCcusageMonthGraph(unittest.TestCase):
         self.assertNotIn("prediction-line", html)
         self.assertIn('class: "target-line"', html)
         self.assertIn('"$1000"', html)
+        self.assertIn("Projected month end", html)
+        self.assertNotIn('class: "point"', html)
+
+
+class TestUsageStore(unittest.TestCase):
+    def setUp(self):
+        self.module = load_module()
+        home = tempfile.TemporaryDirectory()
+        self.addCleanup(home.cleanup)
+        env = mock.patch.dict(os.environ, {"HOME": home.name, "XDG_CACHE_HOME": f"{home.name}/.cache"})
+        env.start()
+        self.addCleanup(env.stop)
+        self.transcript = Path(home.name) / ".claude" / "projects" / "-src-one" / "aaaa.jsonl"
+        self.parsed = []
+        parse_reply = self.module.parse_reply
+        self.module.parse_reply = lambda line: (self.parsed.append(line), parse_reply(line))[1]
+
+    def output_tokens(self, since, until):
+        payload = self.module.load_usage(since, until)
+        return {row["date"]: int(row["outputTokens"]) for row in payload["projects"].get("-src-one", [])}
+
+    def test_past_days_are_read_from_the_store(self):
+        write_transcript(
+            self.transcript,
+            [
+                reply("msg_1", "2026-04-01T12:00:00Z", "claude-opus-4-5", 1, output_tokens=10),
+                reply("msg_2", "2026-04-02T12:00:00Z", "claude-opus-4-5", 1, output_tokens=20),
+            ],
+        )
+        april = {local("2026-04-01T12:00"): 10, local("2026-04-02T12:00"): 20}
+        self.assertEqual(self.output_tokens(date(2026, 4, 1), date(2026, 4, 30)), april)
+        self.assertEqual(len(self.parsed), 2)
+
+        self.transcript.unlink()
+        self.parsed.clear()
+        self.assertEqual(self.output_tokens(date(2026, 4, 1), date(2026, 4, 30)), april)
+        self.assertEqual(self.output_tokens(date(2026, 4, 2), date(2026, 4, 2)), {"2026-04-02": 20})
+        self.assertEqual(self.parsed, [])
+        # Reading the days not stored yet leaves the stored ones alone.
+        self.assertEqual(self.output_tokens(date(2026, 3, 1), date(2026, 4, 30)), april)
+        self.assertEqual(self.parsed, [])
+
+    def test_stored_days_are_repriced(self):
+        write_transcript(
+            self.transcript,
+            [reply("msg_1", "2026-04-01T12:00:00Z", "claude-opus-4-5", 1, output_tokens=1_000_000)],
+        )
+        day = date(2026, 4, 1)
+
+        def cost():
+            payload = self.module.load_usage(day, day)
+            return [row["totalCost"] for row in payload["projects"]["-src-one"]]
+
+        self.assertEqual(cost(), [25])
+        self.transcript.unlink()
+        self.module.model_prices.cache_clear()
+        self.addCleanup(self.module.model_prices.cache_clear)
+        with mock.patch.object(self.module, "PRICING", (("opus", "5", "20"),)):
+            self.assertEqual(cost(), [20])
+        self.assertEqual(len(self.parsed), 1)
+
+    def test_todays_transcripts_are_read_incrementally(self):
+        now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+        today = date.today()
+        write_transcript(self.transcript, [reply("msg_1", now, "claude-opus-4-5", 1, output_tokens=10)])
+        self.assertEqual(self.output_tokens(today, today), {today.isoformat(): 10})
+
+        self.parsed.clear()
+        self.assertEqual(self.output_tokens(today, today), {today.isoformat(): 10})
+        self.assertEqual(self.parsed, [])
+
+        appended = [
+            reply("msg_1", now, "claude-opus-4-5", 2, output_tokens=10),
+            reply("msg_2", now, "claude-opus-4-5", 1, output_tokens=5),
+        ]
+        write_transcript(self.transcript, appended, mode="a")
+        self.assertEqual(self.output_tokens(today, today), {today.isoformat(): 15})
+        self.assertEqual(len(self.parsed), 2)
+
+        self.parsed.clear()
+        write_transcript(self.transcript, [reply("msg_3", now, "claude-opus-4-5", 1, output_tokens=1)])
+        self.assertEqual(self.output_tokens(today, today), {today.isoformat(): 1})
+        self.assertEqual(len(self.parsed), 1)
 
 
 if __name__ == "__main__":
@@ -12,8 +12,13 @@ Every input line must produce output (either prettified or raw).
 
 from __future__ import annotations
 
+import json
+import os
+import re
+import signal
 import subprocess
 import sys
+import time
 from pathlib import Path
 
 import pytest
@@ -32,6 +37,18 @@ def run_pretty_logs(input_text: str) -> tuple[str, str, int]:
     return result.stdout, result.stderr, result.returncode
 
 
+def run_pretty_logs_bytes(input_bytes: bytes | None, *args: str) -> bytes:
+    """Run pretty-logs on raw bytes (None: no stdin) and return raw stdout."""
+    result = subprocess.run(
+        [str(SCRIPT_PATH), *args],
+        input=input_bytes,
+        stdin=subprocess.DEVNULL if input_bytes is None else None,
+        capture_output=True,
+    )
+    assert result.returncode == 0, result.stderr
+    return result.stdout
+
+
 # =============================================================================
 # CRITICAL: Never Drop Lines Tests
 # =============================================================================
@@ -210,6 +227,39 @@ class TestLevelDetection:
         assert "extra" in stdout
         assert "data" in stdout
 
+    def test_prefix_keyword_gives_level(self):
+        """A level keyword in an ad-hoc prefix supplies the level."""
+        stdout, stderr, rc = run_pretty_logs('[worker-1] WARN {"msg": "prefixed", "n": 1}\n')
+        assert '"n": 1' in stdout
+
+    def test_prefix_keyword_priority(self):
+        """INFO beats WARN/ERROR when a prefix mentions several keywords."""
+        stdout, stderr, rc = run_pretty_logs('ERROR then INFO {"msg": "both"}\n')
+        assert "INFO: both" in stdout
+
+    def test_escapes_only_prefix_is_not_ad_hoc(self):
+        """A prefix of terminal escapes alone doesn't make a line ad-hoc."""
+        stdout, stderr, rc = run_pretty_logs('\x1b[32m\x1b[0m {"level": "info", "msg": "colored"}\n')
+        assert "INFO: colored" in stdout
+
+    def test_ad_hoc_prefix_with_level_passes_through(self):
+        """An ad-hoc prefix without a keyword means the line is printed raw."""
+        line = '[worker] started {"level": "info", "msg": "adhoc"}\n'
+        stdout, stderr, rc = run_pretty_logs(line)
+        assert stdout == line
+
+    def test_unknown_zap_level_falls_back_to_keyword(self):
+        """An unrecognized zap level falls back to a keyword in the prefix."""
+        line = '2025-12-10T08:36:15.591-0500\tDPANIC\tx.go:1\tERROR here\t{"a": 1}\n'
+        stdout, stderr, rc = run_pretty_logs(line)
+        assert '"a": 1' in stdout
+
+    def test_non_string_level_passes_through(self):
+        """A numeric level (e.g. bunyan) is printed raw, not dropped."""
+        line = '{"level": 30, "msg": "numeric"}\n'
+        stdout, stderr, rc = run_pretty_logs(line)
+        assert stdout == line
+
 
 # =============================================================================
 # Ignored Errors Tests
@@ -387,6 +437,551 @@ class TestGoStackTraces:
         assert "file.go:100" in stdout
         assert "another log" in stdout
 
+    @staticmethod
+    def trace(frames: int) -> bytes:
+        return b"".join(
+            b"go.temporal.io/sdk/internal.(*baseWorker).runPoller.func%d\n"
+            b"\t/Users/dan/go/pkg/mod/x/worker.go:%d\n" % (i, i)
+            for i in range(frames)
+        )
+
+    def test_deep_trace_not_dropped(self):
+        """Traces longer than the number of lines held at once are written in full, in order."""
+        output = run_pretty_logs_bytes(b'{"level": "error", "msg": "panic"}\n' + self.trace(3000) + b"after\n")
+        lines = output.decode().splitlines()
+        frames = [line for line in lines if "worker.go:" in line]
+        assert frames == [f"  \t/Users/dan/go/pkg/mod/x/worker.go:{i}" for i in range(3000)]
+        assert lines[-1] == "after"
+
+    def test_stack_frames_folds_trace(self):
+        log = self.trace(10) + b"between\n" + self.trace(3)
+        output = run_pretty_logs_bytes(log, "--stack-frames", "2").decode()
+        assert output.splitlines() == [
+            "  go.temporal.io/sdk/internal.(*baseWorker).runPoller.func0",
+            "  \t/Users/dan/go/pkg/mod/x/worker.go:0",
+            "  go.temporal.io/sdk/internal.(*baseWorker).runPoller.func1",
+            "  \t/Users/dan/go/pkg/mod/x/worker.go:1",
+            "  … 16 more stack trace lines",
+            "between",
+            "  go.temporal.io/sdk/internal.(*baseWorker).runPoller.func0",
+            "  \t/Users/dan/go/pkg/mod/x/worker.go:0",
+            "  go.temporal.io/sdk/internal.(*baseWorker).runPoller.func1",
+            "  \t/Users/dan/go/pkg/mod/x/worker.go:1",
+            "  … 2 more stack trace lines",
+        ]
+
+    def test_trace_spanning_chunks_folded_once(self):
+        """A trace longer than a read chunk is still folded as one trace."""
+        output = run_pretty_logs_bytes(self.trace(30_000), "--stack-frames", "1").decode()
+        assert output.splitlines()[-1] == "  … 59998 more stack trace lines"
+
+
+# =============================================================================
+# Chunked Streaming Engine
+# =============================================================================
+
+
+class TestStreamingEngine:
+    """Tests for chunked reading and raw pass-through of non-JSON lines."""
+
+    MIXED = (
+        b"plain text\n"
+        b'{"level": "info", "msg": "json msg"}\n'
+        b"malformed {json\n"
+        b"go.temporal.io/sdk/internal.(*baseWorker).runPoller.func1\n"
+        b'2025-12-10T08:36:15.591-0500\tWARN\tutil.go:10\twarning message\t{"count": 5}\n'
+        b"another plain line\n"
+    )
+
+    def test_plain_text_passes_through_byte_for_byte(self):
+        """Plain text, including invalid UTF-8 and CRLF, is emitted unchanged."""
+        data = b"caf\xe9 latin-1\r\n\x1b[31mred\x1b[0m\n\ttabbed\n"
+        assert run_pretty_logs_bytes(data) == data
+
+    def test_final_line_without_newline(self):
+        """A trailing partial line is not dropped."""
+        stdout = run_pretty_logs_bytes(b'first\n{"level": "info", "msg": "last"}')
+        assert stdout.startswith(b"first\n")
+        assert b"INFO: last" in stdout
+
+    def test_lines_spanning_chunk_boundaries(self):
+        """Lines split across read chunks are reassembled before processing."""
+        lines = [f'{{"level": "info", "msg": "m{i}", "pad": "{"x" * 50}"}}' for i in range(30000)]
+        stdout = run_pretty_logs_bytes(("\n".join(lines) + "\n").encode())
+        out_lines = stdout.decode().splitlines()
+        assert out_lines == [f"INFO: m{i}" for i in range(30000)]
+
+    def test_line_buffered_matches_chunked(self):
+        """--line-buffered produces the same output as the chunked engine."""
+        assert run_pretty_logs_bytes(self.MIXED) == run_pretty_logs_bytes(
+            self.MIXED, "--line-buffered"
+        )
+
+    def test_output_order_preserved(self):
+        """Raw and rendered lines are interleaved in input order."""
+        stdout = run_pretty_logs_bytes(self.MIXED).decode()
+        positions = [
+            stdout.index(s)
+            for s in ["plain text", "json msg", "malformed {json", "runPoller", "warning", "another plain line"]
+        ]
+        assert positions == sorted(positions)
+
+    def test_line_buffered_files_are_closed(self, tmp_path):
+        logs = [tmp_path / "a.log", tmp_path / "b.log"]
+        for log in logs:
+            log.write_bytes(self.MIXED)
+        result = subprocess.run(
+            [str(SCRIPT_PATH), "--line-buffered", *map(str, logs)],
+            stdin=subprocess.DEVNULL,
+            capture_output=True,
+            env={**os.environ, "PYTHONDEVMODE": "1"},
+        )
+        assert result.returncode == 0, result.stderr
+        assert result.stdout == run_pretty_logs_bytes(self.MIXED * 2)
+        assert b"ResourceWarning" not in result.stderr
+
+
+# =============================================================================
+# INFO Log File
+# =============================================================================
+
+
+class TestInfoSink:
+    """Tests for writing INFO records to a JSONL file."""
+
+    def test_info_records_written_as_jsonl(self, tmp_path):
+        """INFO records go to the file, one compact JSON object per line."""
+        info_log = tmp_path / "info.jsonl"
+        data = (
+            '{"level": "info", "msg": "one"}\n'
+            '2025-12-10T08:36:15.591-0500\tINFO\tfile.go:1\ttwo\t{"key": "val"}\n'
+            '{"level": "error", "msg": "boom"}\n'
+        ).encode()
+        stdout = run_pretty_logs_bytes(data, "--info-log", str(info_log))
+
+        assert b"INFO:" not in stdout
+        assert b"boom" in stdout
+        records = [json.loads(line) for line in info_log.read_text().splitlines()]
+        assert [r.get("msg") for r in records] == ["one", None]
+        assert records[1]["key"] == "val"
+        assert "INFO" in records[1]["_prefix"]
+
+    def test_info_log_truncated_at_start(self, tmp_path):
+        """An existing INFO log file is replaced, not appended to."""
+        info_log = tmp_path / "info.jsonl"
+        info_log.write_text("stale\n")
+        run_pretty_logs_bytes(b'{"level": "info", "msg": "fresh"}\n', "--info-log", str(info_log))
+        assert info_log.read_text() == '{"level":"info","msg":"fresh"}\n'
+
+    def test_rotation_keeps_every_record(self, tmp_path):
+        """Rotated files together hold every record, each file valid JSONL."""
+        info_log = tmp_path / "info.jsonl"
+        n = 5000
+        data = "".join(f'{{"level": "info", "msg": "m{i}"}}\n' for i in range(n)).encode()
+        run_pretty_logs_bytes(
+            data,
+            "--info-log",
+            str(info_log),
+            "--info-log-max-bytes",
+            "64K",
+            "--info-log-backups",
+            "9",
+        )
+
+        files = sorted(tmp_path.iterdir(), key=lambda p: p.name, reverse=True)
+        assert len(files) > 1
+        for f in files:
+            assert f.stat().st_size <= 2 * 64 * 1024
+        msgs = [json.loads(line)["msg"] for f in files for line in f.read_text().splitlines()]
+        assert sorted(msgs, key=lambda m: int(m[1:])) == [f"m{i}" for i in range(n)]
+
+
+# =============================================================================
+# JSON Backends
+# =============================================================================
+
+
+class TestJsonBackends:
+    """The fast JSON backend must not change output."""
+
+    LINES = [
+        '{"level": "error", "msg": "plain", "count": 5, "ok": true, "none": null}',
+        '{"level": "warn", "msg": "unicode \\u00fc and emoji \\ud83c\\udf89 and raw ñ"}',
+        '{"level": "error", "big": 123456789012345678901234567890, "neg": -9223372036854775808}',
+        '{"level": "error", "below_int64": -9223372036854775809}',
+        '{"level": "error", "max_uint64": 18446744073709551615}',
+        '{"level": "error", "floats": [0.1, 1e16, 1.5e-7, 0.00001, 123.456, -0.0, 1e300]}',
+        '{"level": "warn", "nan": NaN, "inf": Infinity}',
+        '{"level": "error", "ctl": "del \\u007f bell \\u0007 tab \\t nl \\n", "stacktrace": "a\\nb"}',
+        '2025-12-10T08:36:15.591-0500\tERROR\tapp.go:42\tfailed\t{"error": "refused", "nested": {"a": []}}',
+        '{"level": "info", "no_msg": {"deep": [1, 2, {"x": "y"}]}}',
+    ]
+
+    def test_backends_produce_identical_output(self):
+        data = ("\n".join(self.LINES) + "\n").encode()
+        stdlib = run_pretty_logs_bytes(data, "--json-backend", "json")
+        fast = run_pretty_logs_bytes(data, "--json-backend", "orjson")
+        assert stdlib == fast
+        assert b"123456789012345678901234567890" in stdlib
+        assert b"-9223372036854775809" in stdlib
+        assert b"NaN" in stdlib
+
+    def test_info_log_valid_with_either_backend(self, tmp_path):
+        data = '{"level": "info", "msg": "caf\\u00e9", "n": 12345678901234567890123}\n'.encode()
+        for backend in ["json", "orjson"]:
+            info_log = tmp_path / f"{backend}.jsonl"
+            run_pretty_logs_bytes(data, "--info-log", str(info_log), "--json-backend", backend)
+            assert json.loads(info_log.read_text()) == {
+                "level": "info",
+                "msg": "café",
+                "n": 12345678901234567890123,
+            }
+
+
+class TestPlainRenderer:
+    """INFO one-liners and stack trace lines are written without rich."""
+
+    def test_long_message_not_wrapped(self):
+        msg = "word " * 40
+        output = run_pretty_logs_bytes(json.dumps({"level": "info", "msg": msg}).encode() + b"\n")
+        assert output.decode() == f"INFO: {msg}\n"
+
+    def test_markup_in_message_printed_literally(self):
+        output = run_pretty_logs_bytes(b'{"level": "info", "msg": "[bold]x[/bold] [dim]"}\n')
+        assert output == b"INFO: [bold]x[/bold] [dim]\n"
+
+    def test_color_when_forced(self):
+        result = subprocess.run(
+            [str(SCRIPT_PATH)],
+            input=b'{"level": "info", "msg": "hello"}\n\t/Users/dan/go/x.go:12\n',
+            capture_output=True,
+            env={**os.environ, "FORCE_COLOR": "1"},
+        )
+        assert result.stdout == b"\x1b[2mINFO:\x1b[0m hello\n\x1b[2m  \t/Users/dan/go/x.go:12\x1b[0m\n"
+
+
+# =============================================================================
+# Log File Input
+# =============================================================================
+
+
+def make_mixed_log(path: Path, n: int) -> None:
+    """Write a log of n lines mixing plain text, JSON and stack traces."""
+    with path.open("w") as f:
+        for i in range(n):
+            if i % 97 == 0:
+                f.write(f'2025-12-10T08:36:15.591-0500\tINFO\tfile.go:1\tzap {i}\t{{"key": "val"}}\n')
+            elif i % 89 == 0:
+                f.write(f'{{"level": "error", "msg": "bad {i}"}}\n')
+            elif i % 83 == 0:
+                f.write(f"\t/Users/dan/go/pkg/mod/x/worker.go:{i}\n")
+            else:
+                f.write(f"plain text line {i} with enough padding to make the file big\n")
+
+
+class TestFileInput:
+    """Tests for reading a log file instead of stdin."""
+
+    def test_file_matches_stdin(self, tmp_path):
+        log = tmp_path / "app.log"
+        make_mixed_log(log, 2000)
+        assert run_pretty_logs_bytes(None, str(log)) == run_pretty_logs_bytes(log.read_bytes())
+
+    def test_file_with_piped_stdin(self, tmp_path):
+        """A file is read even when stdin is a pipe; a missing one points to --info-log,
+        since `cmd | pretty-logs FILE` used to name the INFO log file."""
+        log = tmp_path / "app.log"
+        log.write_bytes(b"existing\n")
+        piped = b'{"level": "info", "msg": "x"}\n'
+        assert run_pretty_logs_bytes(piped, str(log)) == b"existing\n"
+
+        result = subprocess.run([str(SCRIPT_PATH), str(tmp_path / "info.log")], input=piped, capture_output=True)
+        assert result.returncode == 2
+        assert b"--info-log" in result.stderr
+        assert not (tmp_path / "info.log").exists()
+
+    def test_parallel_preserves_order(self, tmp_path):
+        """Parallel workers produce exactly the serial output, in order."""
+        log = tmp_path / "app.log"
+        make_mixed_log(log, 200_000)
+        assert log.stat().st_size > 8 * 1024 * 1024
+        info = {j: tmp_path / f"info{j}.jsonl" for j in (1, 4)}
+
+        serial = run_pretty_logs_bytes(None, str(log), "-j", "1", "--info-log", str(info[1]))
+        parallel = run_pretty_logs_bytes(None, str(log), "-j", "4", "--info-log", str(info[4]))
+
+        assert parallel == serial
+        assert info[4].read_bytes() == info[1].read_bytes()
+        assert b"plain text line 199999 " in parallel
+        assert len(info[4].read_text().splitlines()) == len(range(0, 200_000, 97))
+
+    def test_parallel_stack_frames_matches_serial(self, tmp_path):
+        """A folded trace crossing range boundaries is folded once, as in serial."""
+        log = tmp_path / "app.log"
+        log.write_bytes(b'{"level": "error", "msg": "panic"}\n' + TestGoStackTraces.trace(200_000) + b"after\n")
+        assert log.stat().st_size > 8 * 1024 * 1024
+
+        serial = run_pretty_logs_bytes(None, str(log), "-j", "1", "--stack-frames", "2")
+        parallel = run_pretty_logs_bytes(None, str(log), "-j", "4", "--stack-frames", "2")
+
+        assert parallel == serial
+        assert parallel.count("more stack trace lines".encode()) == 1
+
+
+# =============================================================================
+# Time and Level Filters, Sidecar Index
+# =============================================================================
+
+
+def make_timed_log(path: Path, n: int, start: int = 0) -> None:
+    """Append n zap lines, one per second from 08:00:00 + start, with a stack trace after each ERROR."""
+    with path.open("a") as f:
+        for i in range(start, start + n):
+            level = "ERROR" if i % 10 == 0 else "INFO"
+            ts = f"2025-12-10T{8 + i // 3600:02d}:{i // 60 % 60:02d}:{i % 60:02d}.000-0500"
+            f.write(f'{ts}\t{level}\tpkg/file.go:{i}\tmessage {i}\t{{"i": {i}}}\n')
+            if level == "ERROR":
+                f.write(f"\t/Users/dan/go/pkg/mod/x/worker.go:{i}\n")
+
+
+class TestTimeAndLevelFilter:
+    """Tests for --since/--until/--level, with and without an index."""
+
+    SINCE = "2025-12-10T09:00:00-05:00"
+    UNTIL = "2025-12-10T09:00:59-05:00"
+
+    def test_level_keeps_continuation_lines(self):
+        log = (
+            b'2025-12-10T08:00:00.000-0500\tINFO\tf.go:1\tfine\t{"a": 1}\n'
+            b'2025-12-10T08:00:01.000-0500\tERROR\tf.go:2\tbroken\t{"a": 2}\n'
+            b"\t/Users/dan/go/pkg/mod/x/worker.go:7\n"
+            b'{"level": "info", "msg": "json fine"}\n'
+            b'{"level": "error", "msg": "json broken"}\n'
+        )
+        output = run_pretty_logs_bytes(log, "--level", "error").decode()
+        assert "broken" in output and "worker.go:7" in output and "json broken" in output
+        assert "fine" not in output
+
+    def test_time_window(self, tmp_path):
+        log = tmp_path / "app.log"
+        make_timed_log(log, 7200)
+        output = run_pretty_logs_bytes(None, str(log), "--since", self.SINCE, "--until", self.UNTIL)
+        messages = [line for line in output.decode().splitlines() if line.startswith("INFO")]
+        assert messages[0] == "INFO: message 3601"
+        assert messages[-1] == "INFO: message 3659"
+        assert len(messages) == 54
+
+    def test_index_gives_same_output(self, tmp_path):
+        log = tmp_path / "app.log"
+        make_timed_log(log, 40_000)
+        assert log.stat().st_size > 3 * 1024 * 1024
+        args = ("--since", self.SINCE, "--until", self.UNTIL, "--level", "error")
+        unindexed = run_pretty_logs_bytes(None, str(log), *args)
+        subprocess.run([str(SCRIPT_PATH), "index", str(log)], check=True, capture_output=True)
+        assert (tmp_path / "app.log.idx").exists()
+        assert run_pretty_logs_bytes(None, str(log), *args) == unindexed
+        assert b"worker.go:3650" in unindexed
+
+    def test_index_extends_on_append(self, tmp_path):
+        log, fresh = tmp_path / "app.log", tmp_path / "fresh.log"
+        make_timed_log(log, 20_000)
+        subprocess.run([str(SCRIPT_PATH), "index", str(log)], check=True, capture_output=True)
+        make_timed_log(log, 20_000, start=20_000)
+        make_timed_log(fresh, 40_000)
+        output = run_pretty_logs_bytes(None, str(log), "--since", "2025-12-10T19:00:00-05:00")
+        assert b"message 39999" in output and b"message 35999" not in output
+        subprocess.run([str(SCRIPT_PATH), "index", str(fresh)], check=True, capture_output=True)
+        assert (tmp_path / "app.log.idx").read_bytes() == (tmp_path / "fresh.log.idx").read_bytes()
+
+    def test_unwritable_index_falls_back_to_a_scan(self, tmp_path):
+        log = tmp_path / "app.log"
+        make_timed_log(log, 20_000)
+        subprocess.run([str(SCRIPT_PATH), "index", str(log)], check=True, capture_output=True)
+        make_timed_log(log, 20_000, start=20_000)
+        # A directory in the way of the temporary index fails the rewrite, even as root.
+        (tmp_path / "app.log.idx.tmp").mkdir()
+        output = run_pretty_logs_bytes(None, str(log), "--since", "2025-12-10T19:00:00-05:00")
+        assert b"message 39999" in output and b"message 35999" not in output
+
+    def test_rewritten_file_is_reindexed(self, tmp_path):
+        log = tmp_path / "app.log"
+        make_timed_log(log, 20_000)
+        subprocess.run([str(SCRIPT_PATH), "index", str(log)], check=True, capture_output=True)
+        log.unlink()
+        make_timed_log(log, 100, start=36_000)
+        output = run_pretty_logs_bytes(None, str(log), "--since", "2025-12-10T18:00:00-05:00")
+        assert output.decode().count("INFO: message") == 90
+
+
+# =============================================================================
+# Collapsing Repeated Errors
+# =============================================================================
+
+
+class TestCollapseErrors:
+    """Tests for --collapse-errors."""
+
+    @staticmethod
+    def storm(n: int) -> bytes:
+        """n repeats of one error, ten per second, each with a stack trace."""
+        lines = []
+        for i in range(n):
+            ts = f"2025-12-10T09:00:{i // 10:02d}.{i % 10}00-0500"
+            lines.append(
+                f"{ts}\tERROR\tinternal/worker.go:486\tFailed to poll.\t"
+                f'{{"attempt": {i}, "error": "deadline exceeded after {i}ms"}}\n'
+                "go.temporal.io/sdk/internal.(*baseWorker).runPoller.func1\n"
+                "\t/Users/dan/go/pkg/mod/go.temporal.io/sdk/internal/worker.go:486\n"
+            )
+        return "".join(lines).encode()
+
+    def test_repeats_printed_once_and_counted(self):
+        output = run_pretty_logs_bytes(self.storm(250), "--collapse-errors").decode()
+        assert output.count('"attempt"') == 1
+        assert output.count("runPoller") == 1
+        counts = [int(m) for m in re.findall(r"×(\d+) since", output)]
+        # A summary every 10 s of log time (100 repeats), and the rest at exit
+        assert counts == [100, 100, 49]
+
+    def test_interval(self):
+        output = run_pretty_logs_bytes(
+            self.storm(250), "--collapse-errors", "--collapse-interval", "1"
+        ).decode()
+        assert len(re.findall(r"×\d+ since", output)) == 25
+
+    def test_distinct_errors_each_printed(self):
+        log = (
+            b'{"level": "error", "msg": "disk full", "error": "no space on /dev/1"}\n'
+            b'{"level": "error", "msg": "disk full", "error": "no space on /dev/2"}\n'
+            b'{"level": "error", "msg": "connection refused"}\n'
+            b"plain line\n"
+            b'{"level": "info", "msg": "ok"}\n'
+        )
+        output = run_pretty_logs_bytes(log, "--collapse-errors").decode()
+        assert "no space on /dev/1" in output and "connection refused" in output
+        assert "/dev/2" not in output
+        assert "×1 since" in output
+        assert "plain line" in output and "INFO: ok" in output
+
+    def test_off_by_default(self):
+        output = run_pretty_logs_bytes(self.storm(20)).decode()
+        assert output.count('"attempt"') == 20
+        assert "×" not in output
+
+
+# =============================================================================
+# Stats
+# =============================================================================
+
+
+class TestStats:
+    """Tests for --stats."""
+
+    LOG = (
+        b'2025-12-10T08:36:15.591-0500\tINFO\tworker/poller.go:10\tpolling\t{"a": 1}\n'
+        b'2025-12-10T08:36:16.000-0500\tINFO\tworker/poller.go:10\tpolling\t{"a": 2}\n'
+        b"2025-12-10T08:36:17.000-0500\tERROR\tworker/poller.go:20\tpoll failed after 30ms\n"
+        b'{"level": "error", "msg": "poll failed", "error": "timeout 1", "caller": "x/y.go:3"}\n'
+        b'{"level": "error", "msg": "poll failed", "error": "timeout 2", "caller": "x/y.go:3"}\n'
+        b'{"level": "warn", "msg": "slow"}\n'
+        b"plain text\n"
+    )
+
+    def run(self, *args: str) -> subprocess.CompletedProcess:
+        result = subprocess.run([str(SCRIPT_PATH), *args], input=self.LOG, capture_output=True)
+        assert result.returncode == 0, result.stderr
+        return result
+
+    def test_output_unchanged(self):
+        assert self.run("--stats").stdout == self.run().stdout
+
+    def test_summary_at_exit(self):
+        summary = self.run("--stats").stderr.decode()
+        assert "6 records" in summary
+        assert "levels   ERROR 3  INFO 2  WARN 1" in summary
+        assert re.search(r"callers\s+2  worker/poller.go:10", summary)
+        assert re.search(r"errors\s+2  poll failed error=timeout # \(x/y.go:3\)", summary)
+        # Zap lines without a JSON payload are counted too
+        assert re.search(r"\s1  poll failed after #ms \(worker/poller.go:20\)", summary)
+
+    def test_time_buckets(self):
+        summary = self.run("--stats", "--stats-interval", "1").stderr.decode()
+        times = next(line for line in summary.splitlines() if line.startswith("times"))
+        # Three one-second buckets of log time; the records without one apart
+        assert re.fullmatch(
+            r"times    \d\d:\d\d:\d\d 1  \d\d:\d\d:\d\d 1  \d\d:\d\d:\d\d 1 \(1 errors\)  untimed 3 \(2 errors\)",
+            times,
+        )
+
+
+# =============================================================================
+# Follow Mode
+# =============================================================================
+
+
+class TestFollow:
+    """Tests for --follow: new bytes only, across truncation and rotation."""
+
+    def follow(self, tmp_path, *paths: Path, actions) -> tuple[str, str]:
+        """Follow paths while running each action, then stop and return (stdout, stderr)."""
+        stdout, stderr = tmp_path / "stdout", tmp_path / "stderr"
+        with stdout.open("wb") as out, stderr.open("wb") as err:
+            proc = subprocess.Popen(
+                [str(SCRIPT_PATH), "--follow", *map(str, paths)],
+                stdin=subprocess.DEVNULL,
+                stdout=out,
+                stderr=err,
+            )
+            try:
+                time.sleep(1.5)
+                for action in actions:
+                    action()
+                    time.sleep(0.5)
+            finally:
+                proc.send_signal(signal.SIGINT)
+                proc.wait(timeout=10)
+        return stdout.read_text(), stderr.read_text()
+
+    def test_new_lines_only(self, tmp_path):
+        log = tmp_path / "app.log"
+        log.write_text("existing line\n")
+
+        def append():
+            with log.open("a") as f:
+                f.write('{"level": "error", "msg": "appended"}\nplain appended\n')
+
+        stdout, _ = self.follow(tmp_path, log, actions=[append])
+        assert "existing line" not in stdout
+        assert '"msg": "appended"' in stdout and "plain appended" in stdout
+
+    def test_rotation_and_truncation(self, tmp_path):
+        log = tmp_path / "app.log"
+        log.write_text("")
+
+        def write(text, mode="a", path=log):
+            def action():
+                with path.open(mode) as f:
+                    f.write(text)
+
+            return action
+
+        actions = [
+            write("before rotation\n"),
+            lambda: log.rename(tmp_path / "app.log.1"),
+            write("late write to rotated file\n", path=tmp_path / "app.log.1"),
+            write("new file\n", "w"),
+            write("", "w"),
+            write("after truncation\n"),
+        ]
+        stdout, stderr = self.follow(tmp_path, log, actions=actions)
+        assert stdout.splitlines() == [
+            "before rotation",
+            "late write to rotated file",
+            "new file",
+            "after truncation",
+        ]
+        assert "truncated" in stderr
+
 
 if __name__ == "__main__":
     sys.exit(pytest.main([__file__, "-v"]))
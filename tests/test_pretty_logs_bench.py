@@ -0,0 +1,71 @@
+#!/usr/bin/env -S uv run --script
+#
+# /// script
+# requires-python = ">=3.12"
+# dependencies = ["pytest"]
+# ///
+"""Tests for the pretty-logs-bench synthetic log generator."""
+
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+SCRIPT_PATH = Path(__file__).parent.parent / "python" / "pretty-logs-bench"
+PRETTY_LOGS_PATH = Path(__file__).parent.parent / "python" / "pretty-logs"
+
+
+def generate(path: Path, *args: str) -> str:
+    result = subprocess.run(
+        [str(SCRIPT_PATH), "--generate", str(path), *args], capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
+    return result.stderr
+
+
+class TestGenerate:
+    def test_line_count_reported(self, tmp_path):
+        log = tmp_path / "synthetic.log"
+        stderr = generate(log, "--records", "500")
+        assert stderr.strip() == f"{log}: {len(log.read_text().splitlines())} lines"
+
+    def test_mix_proportions(self, tmp_path):
+        log = tmp_path / "synthetic.log"
+        generate(log, "--records", "1000", "--mix", "json=1", "--errors", "0")
+        records = [json.loads(line) for line in log.read_text().splitlines()]
+        assert len(records) == 1000
+        assert {r["level"] for r in records} == {"info"}
+
+    def test_deterministic(self, tmp_path):
+        a, b = tmp_path / "a.log", tmp_path / "b.log"
+        generate(a, "--records", "300", "--seed", "7")
+        generate(b, "--records", "300", "--seed", "7")
+        assert a.read_bytes() == b.read_bytes()
+
+    def test_pretty_logs_handles_every_kind(self, tmp_path):
+        log = tmp_path / "synthetic.log"
+        generate(log, "--records", "300", "--errors", "20")
+        result = subprocess.run(
+            [str(PRETTY_LOGS_PATH), str(log)], stdin=subprocess.DEVNULL, capture_output=True, text=True
+        )
+        assert result.returncode == 0, result.stderr
+        assert "runPoller" in result.stdout
+        assert "INFO: " in result.stdout
+        assert "outcome:{result:{}}" in result.stdout
+
+    def test_unknown_kind_rejected(self, tmp_path):
+        result = subprocess.run(
+            [str(SCRIPT_PATH), "--generate", str(tmp_path / "x.log"), "--mix", "yaml=1"],
+            capture_output=True,
+            text=True,
+        )
+        assert result.returncode != 0
+        assert "unknown record kind" in result.stderr
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))